@@ -15,19 +15,35 @@ Mobile Voice Assistant (single-file)
 Usage:
   1) Give execute permission: chmod +x mobile_assistant.py
   2) Run: python3 mobile_assistant.py
+     or: python3 mobile_assistant.py --ptt   (push-to-talk: no always-on listening;
+         press Enter, or in Termux a volume key, to speak a command)
 Notes:
   - Termux API improves UX (install: pkg install termux-api, and the Termux:API app from PlayStore if needed).
   - On fallback mode (no termux), install required pip packages listed in README below.
+  - Push-to-talk via volume keys: Termux uses them as Ctrl/Fn by default, so add
+    "volume-keys = volume" to ~/.termux/termux.properties and run termux-reload-settings.
+    Presses are seen as a change of the music volume (polled once per second).
 """
 
+import array
+import asyncio
+import atexit
+import collections
+import heapq
+import itertools
+import json
 import os
-import shutil
+import re
+import select
+import shlex
+import signal
 import subprocess
 import sys
-import time
 import threading
+import time
 import webbrowser
-from datetime import datetime
+from datetime import datetime, timedelta
+from urllib.parse import quote, quote_plus
 
 # Optional imports for fallback mode
 try:
@@ -45,17 +61,148 @@ try:
 except Exception:
     wikipedia = None
 
+# Optional on-device wake-word spotting (no cloud STT while idle)
+try:
+    import pvporcupine
+except Exception:
+    pvporcupine = None
+
+try:
+    import pyaudio
+except Exception:
+    pyaudio = None
+
+# Optional energy/zero-crossing VAD in front of the spotter (numba JIT if present)
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    import numba
+except Exception:
+    numba = None
+
+# Optional streaming STT over a reused realtime WebSocket
+try:
+    import assemblyai as aai
+except Exception:
+    aai = None
+
+try:
+    import sounddevice as sd
+except Exception:
+    sd = None
+
 # Config
 WAKE_WORDS = ("hey jarvis", "ok jarvis", "jarvis")
+_WAKE_RE = re.compile(r"\b(?:" + "|".join(re.escape(w) for w in WAKE_WORDS) + r")\b")
 NOTES_DIR = os.path.expanduser("~/assistant_notes")
+NOTES_JOURNAL = os.path.join(NOTES_DIR, "journal.ndjson")
+NOTE_FLUSH_INTERVAL = 2.0  # seconds a note may sit in memory before it is written
+NOTE_FLUSH_BATCH = 8  # ...or flush as soon as this many are pending
 REMINDERS = []  # (datetime, message)
+TIME_FORMAT = "The time is %I:%M %p."
+KWS_KEYWORD = "jarvis"  # Porcupine built-in keyword
+PICOVOICE_ACCESS_KEY = os.environ.get("PICOVOICE_ACCESS_KEY", "")
+ASSEMBLYAI_API_KEY = os.environ.get("ASSEMBLYAI_API_KEY", "")
+STREAM_SAMPLE_RATE = 16000
+STREAM_MIN_SESSION = 10.0  # seconds; sessions closed sooner than this are not reopened in the background
+VAD_ENERGY_THRESHOLD = 1.0e5  # mean square of int16 samples (~316 RMS)
+VAD_ZCR_THRESHOLD = 150  # zero crossings per frame; catches quiet fricatives ("s" in jarvis)
+TTS_WAIT_TIMEOUT = 15.0  # upper bound on waiting for a spoken prompt to finish
+PTT_VOLUME_STREAM = "music"  # termux-volume stream watched for push-to-talk presses
+PTT_POLL_INTERVAL = 1.0  # seconds
+PTT_VOLUME_TIMEOUT = 5.0  # termux-api helpers hang if the Termux:API app is missing
+VAD_HANGOVER_FRAMES = 32  # keep feeding the spotter ~1s after the last voiced frame
+VAD_PREROLL_FRAMES = 9  # ~290 ms of silence-gated frames replayed at speech onset
 
 # Environment detection
-HAS_TERMUX_TTS = shutil.which("termux-tts-speak") is not None
-HAS_TERMUX_STT = shutil.which("termux-speech-to-text") is not None
-HAS_TERMUX_OPEN = shutil.which("termux-open") is not None
-HAS_TERMUX_SMS = shutil.which("termux-sms-send") is not None
-HAS_TERMUX_CALL = shutil.which("termux-telephony-call") is not None
+def _path_executables():
+    """Names of everything on $PATH, from one listdir per directory."""
+    names = set()
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        try:
+            names.update(os.listdir(d))
+        except OSError:
+            continue
+    return names
+
+_PATH_BINS = _path_executables()
+HAS_TERMUX_TTS = "termux-tts-speak" in _PATH_BINS
+HAS_TERMUX_STT = "termux-speech-to-text" in _PATH_BINS
+HAS_TERMUX_OPEN = "termux-open" in _PATH_BINS
+HAS_TERMUX_SMS = "termux-sms-send" in _PATH_BINS
+HAS_TERMUX_CALL = "termux-telephony-call" in _PATH_BINS
+HAS_TERMUX_VOLUME = "termux-volume" in _PATH_BINS
+_PTT_VOLUME_OK = HAS_TERMUX_VOLUME  # cleared once termux-volume proves unusable
+
+# Persistent shell for termux-* helpers: one write per call instead of a
+# fork+exec of a fresh Python-spawned process each time. The shell's stdout
+# only ever carries the done-markers echoed by _termux_run_wait; command
+# output goes to /dev/null.
+_TERMUX_SH = None
+_TERMUX_SEQ = itertools.count()
+_TERMUX_WAIT_LOCK = threading.Lock()
+
+def _termux_shell():
+    global _TERMUX_SH
+    if _TERMUX_SH is None or _TERMUX_SH.poll() is not None:
+        _TERMUX_SH = subprocess.Popen(
+            ["sh"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+    return _TERMUX_SH
+
+def _termux_write(line):
+    try:
+        sh = _termux_shell()
+        sh.stdin.write(line.encode("utf-8"))
+    except (BrokenPipeError, OSError):
+        # shell died under us; start a fresh one and retry once
+        sh = _termux_shell()
+        sh.stdin.write(line.encode("utf-8"))
+    return sh
+
+def _termux_exec(args, background=True):
+    """Run a termux-* command line through the shared shell (fire-and-forget)."""
+    line = shlex.join(args) + " >/dev/null 2>&1"
+    if background:
+        line += " &"
+    _termux_write(line + "\n")
+
+def _termux_run_wait(args, timeout):
+    """
+    Run a termux-* command in the shared shell's foreground and block until it
+    exits or timeout seconds pass; returns True if it finished. Blocks the
+    calling thread, so never call it on the event loop.
+    """
+    with _TERMUX_WAIT_LOCK:
+        # unique marker: a late marker from an earlier timed-out wait is skipped
+        marker = f"__termux_done_{next(_TERMUX_SEQ)}__".encode()
+        sh = _termux_write(shlex.join(args) + " >/dev/null 2>&1; echo " + marker.decode() + "\n")
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([sh.stdout], [], [], remaining)[0]:
+                return False
+            out = sh.stdout.readline()
+            if not out:
+                return False
+            if out.rstrip() == marker:
+                return True
+
+@atexit.register
+def _close_termux_shell():
+    if _TERMUX_SH is not None and _TERMUX_SH.poll() is None:
+        try:
+            _TERMUX_SH.stdin.close()
+            _TERMUX_SH.wait(timeout=2)
+        except Exception:
+            _TERMUX_SH.terminate()
 
 # Fallback TTS engine if termux not available
 _engine = None
@@ -66,16 +213,20 @@ if not HAS_TERMUX_TTS and pyttsx3:
         _engine = None
 
 def tts(text, block=False):
-    """Speak text using Termux TTS if available, else pyttsx3 fallback."""
+    """
+    Speak text using Termux TTS if available, else pyttsx3 fallback.
+    block=True waits for the speech to finish and blocks the calling thread;
+    from coroutines use ask() instead.
+    """
     if text is None:
         return
     text = str(text)
     if HAS_TERMUX_TTS:
-        # Termux TTS
-        subprocess.Popen(["termux-tts-speak", text])
+        # Termux TTS; when blocking, return as soon as termux-tts-speak exits
         if block:
-            # A naive wait: estimate time by characters
-            time.sleep(min(10, 0.04 * len(text) + 0.5))
+            _termux_run_wait(["termux-tts-speak", text], TTS_WAIT_TIMEOUT)
+        else:
+            _termux_exec(["termux-tts-speak", text])
     elif _engine:
         _engine.say(text)
         if block:
@@ -86,32 +237,218 @@ def tts(text, block=False):
         # As last resort print text (user can read)
         print("[TTS unavailable] " + text)
 
-def listen_once(timeout=6, phrase_time_limit=8):
+async def listen_once(timeout=6, phrase_time_limit=8):
     """
     Capture a single user phrase:
-    - If termux-speech-to-text available, call it (blocking until spoken/closed).
-    - Else try SpeechRecognition with default mic (requires microphone access).
+    - If termux-speech-to-text available, await it (until spoken/closed) without blocking the event loop.
+    - Else, if AssemblyAI streaming is configured, wait for the next final transcript
+      (the server decides when the phrase has ended, so phrase_time_limit only bounds the wait).
+    - Else try SpeechRecognition with default mic (requires microphone access), run in a worker thread.
     Returns recognized text (lowercase) or None.
     """
     if HAS_TERMUX_STT:
+        proc = None
         try:
             # termux-speech-to-text waits for user to speak then prints text to stdout
             # It launches a speech input UI; read result from stdout
-            p = subprocess.run(["termux-speech-to-text"], capture_output=True, text=True, timeout=15)
-            res = p.stdout.strip()
+            proc = await asyncio.create_subprocess_exec(
+                "termux-speech-to-text",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=15)
+            res = stdout.decode("utf-8", errors="replace").strip()
             return res.lower() if res else None
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
+            if proc and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
             return None
         except Exception as e:
             print("Termux STT error:", e)
             return None
 
+    transcriber = await _streaming_stt()
+    if transcriber is not None:
+        return await _stream_listen(transcriber, timeout + phrase_time_limit)
+
     # Fallback via SpeechRecognition
     if sr is None:
         print("No speech recognition available (install SpeechRecognition and PyAudio).")
         return None
 
-    r = sr.Recognizer()
+    return await asyncio.to_thread(_sr_listen, timeout, phrase_time_limit)
+
+# Streaming STT: an AssemblyAI realtime session (pcm_s16le, 16 kHz) is reused
+# across listens, so a listen normally skips the TLS/TCP setup, and
+# endpointing happens server-side. The sounddevice mic stream is only open
+# during a listen, so the wake-word spotter can have the mic back; with no
+# audio between listens the server eventually closes the idle session, and
+# it is reopened in the background right away rather than inside the next
+# listen.
+_STREAM_STT = None  # transcriber of the current session
+_STREAM_CONNECT = None  # asyncio.Task opening a session
+_STREAM_OPENED_AT = 0.0
+_STREAM_AUDIO_MS = 0.0  # audio sent on the current session, in stream time
+_STREAM_LISTENING = False
+_STREAM_FINALS = None  # asyncio.Queue of (audio_end_ms, text) final transcripts
+_STREAM_DISABLED = aai is None or sd is None or not ASSEMBLYAI_API_KEY
+
+async def _streaming_stt():
+    """Current session, waiting for one to be opened if needed; None if unavailable."""
+    global _STREAM_CONNECT
+    if _STREAM_DISABLED or _STREAM_STT is not None:
+        return _STREAM_STT
+    if _STREAM_CONNECT is None or _STREAM_CONNECT.done():
+        _STREAM_CONNECT = asyncio.get_running_loop().create_task(_connect_streaming_stt(background=False))
+    return await asyncio.shield(_STREAM_CONNECT)
+
+async def _connect_streaming_stt(background):
+    global _STREAM_STT, _STREAM_DISABLED, _STREAM_OPENED_AT, _STREAM_AUDIO_MS, _STREAM_FINALS
+    loop = asyncio.get_running_loop()
+    if _STREAM_FINALS is None:
+        _STREAM_FINALS = asyncio.Queue()
+
+    # SDK callbacks run on its own threads; hand results over to the event loop
+    def on_data(transcript):
+        if isinstance(transcript, aai.RealtimeFinalTranscript) and transcript.text:
+            loop.call_soon_threadsafe(_STREAM_FINALS.put_nowait, (transcript.audio_end, transcript.text))
+
+    def on_error(error):
+        # outside a listen this is the idle session being dropped; on_close reopens it
+        if _STREAM_LISTENING:
+            print("Streaming STT error:", error)
+
+    def on_close():
+        try:
+            loop.call_soon_threadsafe(_on_stream_closed, transcriber)
+        except RuntimeError:
+            pass  # loop already gone (interpreter shutdown)
+
+    try:
+        aai.settings.api_key = ASSEMBLYAI_API_KEY
+        transcriber = aai.RealtimeTranscriber(
+            sample_rate=STREAM_SAMPLE_RATE,
+            encoding=aai.AudioEncoding.pcm_s16le,
+            on_data=on_data,
+            on_error=on_error,
+            on_close=on_close,
+        )
+        # TLS handshake: keep it off the loop so reminders still fire
+        await asyncio.to_thread(transcriber.connect)
+    except Exception as e:
+        if background:
+            # leave it to the next listen to retry (and give up if that fails too)
+            print("Streaming STT reconnect failed:", e)
+        else:
+            print("Streaming STT unavailable:", e)
+            _STREAM_DISABLED = True
+        return None
+    _STREAM_STT = transcriber
+    _STREAM_OPENED_AT = time.monotonic()
+    _STREAM_AUDIO_MS = 0.0
+    return transcriber
+
+def _close_transcriber(transcriber):
+    try:
+        transcriber.close()
+    except Exception:
+        pass
+
+def _on_stream_closed(transcriber):
+    """Server closed the session: forget it (if still current), close it off the loop, reopen it."""
+    global _STREAM_STT, _STREAM_CONNECT
+    if _STREAM_STT is not transcriber:
+        return
+    _STREAM_STT = None
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, _close_transcriber, transcriber)
+    # a session that dies right after opening (bad key, quota) would just flap
+    if time.monotonic() - _STREAM_OPENED_AT >= STREAM_MIN_SESSION:
+        if _STREAM_CONNECT is None or _STREAM_CONNECT.done():
+            _STREAM_CONNECT = loop.create_task(_connect_streaming_stt(background=True))
+
+@atexit.register
+def _close_streaming_stt():
+    global _STREAM_STT
+    if _STREAM_STT is not None:
+        transcriber, _STREAM_STT = _STREAM_STT, None
+        _close_transcriber(transcriber)
+
+def _open_stream_mic(transcriber):
+    def feed(indata, frames, time_info, status):
+        global _STREAM_AUDIO_MS
+        transcriber.stream(bytes(indata))
+        _STREAM_AUDIO_MS += frames * 1000.0 / STREAM_SAMPLE_RATE
+
+    mic = sd.RawInputStream(
+        samplerate=STREAM_SAMPLE_RATE,
+        channels=1,
+        dtype="int16",
+        blocksize=STREAM_SAMPLE_RATE // 10,  # 100 ms chunks
+        callback=feed,
+    )
+    mic.start()
+    return mic
+
+def _close_stream_mic(transcriber, mic):
+    # stop feeding, end whatever utterance is still open, then release the mic
+    # so the wake-word spotter can open it
+    mic.stop()
+    try:
+        transcriber.force_end_utterance()
+    except Exception:
+        pass
+    mic.close()
+
+async def _stream_listen(transcriber, wait):
+    global _STREAM_LISTENING
+    # anything ending before this point is speech from an earlier listen
+    start_ms = _STREAM_AUDIO_MS
+    while not _STREAM_FINALS.empty():
+        _STREAM_FINALS.get_nowait()
+    try:
+        mic = await asyncio.to_thread(_open_stream_mic, transcriber)
+    except Exception as e:
+        print("Microphone not available:", e)
+        return None
+    _STREAM_LISTENING = True
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                audio_end, text = await asyncio.wait_for(_STREAM_FINALS.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return None
+            # an utterance cut off by the previous listen can finalize late; skip it
+            if audio_end > start_ms:
+                return text.lower()
+    finally:
+        _STREAM_LISTENING = False
+        await asyncio.to_thread(_close_stream_mic, transcriber, mic)
+
+# SpeechRecognition state: one recognizer, calibrated for ambient noise once
+# (on first use) instead of on every listen.
+_SR_RECOGNIZER = None
+_SR_ENERGY = None
+
+def _sr_recognizer(source):
+    global _SR_RECOGNIZER, _SR_ENERGY
+    if _SR_RECOGNIZER is None:
+        _SR_RECOGNIZER = sr.Recognizer()
+        # keep adapting to background noise mid-stream after the initial calibration
+        _SR_RECOGNIZER.dynamic_energy_threshold = True
+    if _SR_ENERGY is None:
+        _SR_RECOGNIZER.adjust_for_ambient_noise(source, duration=1.0)
+        _SR_ENERGY = _SR_RECOGNIZER.energy_threshold
+    return _SR_RECOGNIZER
+
+def _sr_listen(timeout, phrase_time_limit):
+    """Blocking SpeechRecognition capture + recognition; called off the event loop."""
     mic = None
     try:
         mic = sr.Microphone()
@@ -120,7 +457,7 @@ def listen_once(timeout=6, phrase_time_limit=8):
         return None
 
     with mic as source:
-        r.adjust_for_ambient_noise(source, duration=0.7)
+        r = _sr_recognizer(source)
         try:
             audio = r.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
         except Exception as e:
@@ -135,221 +472,644 @@ def listen_once(timeout=6, phrase_time_limit=8):
         print("STT request failed:", e)
         return None
 
+# VAD kernels over one int16 PCM frame. Compiled with numba when available
+# (cache=True keeps the compiled code across runs), NumPy otherwise.
+if np is not None and numba is not None:
+    @numba.njit(cache=True, fastmath=True)
+    def _frame_energy(frame):
+        acc = 0.0
+        for i in range(frame.shape[0]):
+            x = float(frame[i])
+            acc += x * x
+        return acc / max(frame.shape[0], 1)
+
+    @numba.njit(cache=True)
+    def _zero_crossings(frame):
+        count = 0
+        for i in range(1, frame.shape[0]):
+            if (frame[i - 1] < 0) != (frame[i] < 0):
+                count += 1
+        return count
+elif np is not None:
+    def _frame_energy(frame):
+        f = frame.astype(np.float32)
+        return float(np.mean(f * f)) if f.size else 0.0
+
+    def _zero_crossings(frame):
+        return int(np.count_nonzero(np.diff(np.signbit(frame))))
+
+def _is_speech(frame):
+    energy = _frame_energy(frame)
+    if energy >= VAD_ENERGY_THRESHOLD:
+        return True
+    return energy >= VAD_ENERGY_THRESHOLD / 4 and _zero_crossings(frame) >= VAD_ZCR_THRESHOLD
+
+# Local keyword spotting: Porcupine listens on raw mic frames and only a
+# detected wake word triggers the (network) STT for the actual command.
+_PORCUPINE = None
+_KWS_DISABLED = pvporcupine is None or pyaudio is None
+
+def _kws_detector():
+    global _PORCUPINE, _KWS_DISABLED
+    if _PORCUPINE is None and not _KWS_DISABLED:
+        try:
+            _PORCUPINE = pvporcupine.create(access_key=PICOVOICE_ACCESS_KEY, keywords=[KWS_KEYWORD])
+        except Exception as e:
+            print("Local wake-word engine unavailable:", e)
+            _KWS_DISABLED = True
+    return _PORCUPINE
+
+def _kws_listen(porcupine, stop):
+    """Blocking frame loop; returns True on wake word, False if stopped."""
+    pa = pyaudio.PyAudio()
+    stream = None
+    try:
+        stream = pa.open(
+            rate=porcupine.sample_rate,
+            channels=1,
+            format=pyaudio.paInt16,
+            input=True,
+            frames_per_buffer=porcupine.frame_length,
+        )
+        hangover = 0
+        # frames skipped as silence, so the quiet onset of the word ("j") still
+        # reaches the spotter once the gate opens
+        preroll = collections.deque(maxlen=VAD_PREROLL_FRAMES)
+        while not stop.is_set():
+            pcm = stream.read(porcupine.frame_length, exception_on_overflow=False)
+            if np is not None:
+                # skip the spotter on silence
+                if _is_speech(np.frombuffer(pcm, dtype=np.int16)):
+                    if not hangover:
+                        for prev in preroll:
+                            if porcupine.process(array.array("h", prev)) >= 0:
+                                return True
+                        preroll.clear()
+                    hangover = VAD_HANGOVER_FRAMES
+                elif hangover:
+                    hangover -= 1
+                else:
+                    preroll.append(pcm)
+                    continue
+            if porcupine.process(array.array("h", pcm)) >= 0:
+                return True
+        return False
+    finally:
+        # release the mic so the command STT can open it
+        if stream is not None:
+            stream.close()
+        pa.terminate()
+
+async def wait_for_wake_word():
+    """
+    Wait for the wake word using the local keyword spotter.
+    Returns True once heard, or None if no local spotter is available
+    (caller then falls back to probing with listen_once).
+    """
+    global _KWS_DISABLED
+    porcupine = _kws_detector()
+    if porcupine is None:
+        return None
+    stop = threading.Event()
+    try:
+        return await asyncio.to_thread(_kws_listen, porcupine, stop)
+    except Exception as e:
+        print("Wake-word listener error:", e)
+        _KWS_DISABLED = True
+        return None
+    finally:
+        stop.set()
+
+@atexit.register
+def _close_kws():
+    if _PORCUPINE is not None:
+        _PORCUPINE.delete()
+
+# Push-to-talk: instead of keeping the mic and STT hot, wait for the user to
+# press Enter or a volume key (seen as a change of PTT_VOLUME_STREAM).
+async def _termux_volume(*args):
+    """
+    With no args, return (volume, max_volume) of PTT_VOLUME_STREAM, or None if
+    there is no such stream. With args (stream, level), set that volume.
+    Raises on a timeout or if termux-volume's output is not JSON (e.g. the
+    Termux:API app is missing).
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "termux-volume", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=PTT_VOLUME_TIMEOUT)
+    except asyncio.TimeoutError:
+        # termux-volume is a script around termux-api; kill the whole group,
+        # or the helper keeps our stdout pipe (and proc.wait()) open
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+        raise
+    if args:
+        return None
+    for entry in json.loads(stdout or b"[]"):
+        if entry.get("stream") == PTT_VOLUME_STREAM:
+            return entry.get("volume"), entry.get("max_volume")
+    return None
+
+async def _wait_for_volume_key():
+    """
+    Return True on a volume key press. Returns False (and disables the volume
+    trigger for the rest of the run) if termux-volume errors, times out or has
+    no PTT_VOLUME_STREAM.
+    """
+    global _PTT_VOLUME_OK
+    try:
+        reading = await _termux_volume()
+        if reading is None:
+            raise LookupError(f"no {PTT_VOLUME_STREAM!r} stream")
+        baseline, max_volume = reading
+        # a press at the stream's min/max wouldn't change the value,
+        # so start one step inside the range
+        if max_volume and baseline >= max_volume:
+            baseline = max_volume - 1
+            await _termux_volume(PTT_VOLUME_STREAM, str(baseline))
+        elif baseline <= 0:
+            baseline = 1
+            await _termux_volume(PTT_VOLUME_STREAM, str(baseline))
+        while True:
+            await asyncio.sleep(PTT_POLL_INTERVAL)
+            reading = await _termux_volume()
+            if reading is None:
+                raise LookupError(f"no {PTT_VOLUME_STREAM!r} stream")
+            if reading[0] != baseline:
+                # put the volume back so repeated presses keep working
+                await _termux_volume(PTT_VOLUME_STREAM, str(baseline))
+                return True
+    except Exception as e:
+        print("Volume-key push-to-talk unavailable, use Enter instead:", str(e) or type(e).__name__)
+        _PTT_VOLUME_OK = False
+        return False
+
+async def _wait_for_enter():
+    """Resolve on the next line of stdin; False on EOF."""
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def on_line(line):
+        if not done.done():
+            done.set_result(bool(line))
+
+    fd = sys.stdin.fileno()
+    try:
+        loop.add_reader(fd, lambda: on_line(sys.stdin.readline()))
+    except (OSError, ValueError, NotImplementedError):
+        # stdin not pollable (e.g. a regular file): read it in a daemon thread,
+        # never the default executor, so shutdown can't wait on it
+        def reader():
+            line = sys.stdin.readline()
+            try:
+                loop.call_soon_threadsafe(on_line, line)
+            except RuntimeError:
+                pass  # loop already closed
+        threading.Thread(target=reader, daemon=True).start()
+        return await done
+    try:
+        return await done
+    finally:
+        loop.remove_reader(fd)
+
+_PTT_STDIN_OPEN = True
+
+async def wait_for_push_to_talk():
+    """Wait for Enter or (if usable) a volume key press, whichever comes first."""
+    global _PTT_STDIN_OPEN
+    while True:
+        waiters = {}
+        if _PTT_STDIN_OPEN:
+            waiters[asyncio.ensure_future(_wait_for_enter())] = "enter"
+        if _PTT_VOLUME_OK:
+            waiters[asyncio.ensure_future(_wait_for_volume_key())] = "volume"
+        if not waiters:
+            say_and_print("No push-to-talk input left (stdin closed). Stopping assistant.")
+            sys.exit(0)
+        print("Press " + " or ".join("Enter" if w == "enter" else "a volume key" for w in waiters.values())
+              + " to talk... ", end="", flush=True)
+        pending = set(waiters)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result():
+                        return
+                    if waiters[task] == "enter":
+                        _PTT_STDIN_OPEN = False  # EOF
+                # the finished waiter gave up; keep waiting on the other one
+        finally:
+            for task in pending:
+                task.cancel()
+        print()
+
 # Utility actions
 def say_and_print(msg):
     print("Assistant:", msg)
     tts(msg)
 
+async def ask(msg):
+    """Speak a prompt and, with Termux TTS, wait (off the loop) until it has been
+    spoken, so the listen that follows doesn't pick up the prompt itself."""
+    if not HAS_TERMUX_TTS:
+        say_and_print(msg)
+        return
+    print("Assistant:", msg)
+    await asyncio.to_thread(tts, msg, True)
+
 def ensure_notes_dir():
     os.makedirs(NOTES_DIR, exist_ok=True)
 
+# Notes are written behind: add_note only queues a record, and one writer
+# thread appends pending records to NOTES_JOURNAL with a single os.write.
+_NOTE_BUFFER = []
+_NOTE_COND = threading.Condition()
+_NOTE_WRITE_LOCK = threading.Lock()
+_NOTE_WRITER = None
+
+def _flush_notes():
+    with _NOTE_WRITE_LOCK:
+        with _NOTE_COND:
+            batch = _NOTE_BUFFER[:]
+            _NOTE_BUFFER.clear()
+        if not batch:
+            return
+        data = "".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in batch).encode("utf-8")
+        ensure_notes_dir()
+        # raw fd: no TextIOWrapper/BufferedWriter layers, one write() for the whole batch
+        fd = os.open(NOTES_JOURNAL, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+
+def _note_writer():
+    while True:
+        with _NOTE_COND:
+            while not _NOTE_BUFFER:
+                _NOTE_COND.wait()
+            # give dictation a moment to pile up, unless a full batch is already waiting
+            _NOTE_COND.wait_for(lambda: len(_NOTE_BUFFER) >= NOTE_FLUSH_BATCH, timeout=NOTE_FLUSH_INTERVAL)
+        try:
+            _flush_notes()
+        except Exception as e:
+            print("Note write error:", e)
+
+atexit.register(_flush_notes)
+
+def _exit_on_signal(signum, frame):
+    # SIGHUP (Termux session closed) / SIGTERM skip atexit unless turned into a
+    # normal exit; this lets _flush_notes write any queued notes
+    raise SystemExit(128 + signum)
+
+def install_exit_handlers():
+    for sig in (signal.SIGHUP, signal.SIGTERM):
+        signal.signal(sig, _exit_on_signal)
+
 def add_note(text):
-    ensure_notes_dir()
-    fname = os.path.join(NOTES_DIR, datetime.now().strftime("note_%Y%m%d_%H%M%S.txt"))
-    with open(fname, "w", encoding="utf-8") as f:
-        f.write(text + "\n")
-    return fname
+    global _NOTE_WRITER
+    dt = datetime.now()
+    # Built from the integer fields directly; same name as strftime("note_%Y%m%d_%H%M%S")
+    name = f"note_{dt.year}{dt.month:02d}{dt.day:02d}_{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+    with _NOTE_COND:
+        if _NOTE_WRITER is None:
+            _NOTE_WRITER = threading.Thread(target=_note_writer, daemon=True)
+            _NOTE_WRITER.start()
+        _NOTE_BUFFER.append({"name": name, "time": dt.isoformat(timespec="seconds"), "text": text})
+        _NOTE_COND.notify()
+    return NOTES_JOURNAL
+
+# Fallback browser controller, resolved once instead of on every webbrowser.open()
+_BROWSER = None
+
+def _browser_open(uri):
+    global _BROWSER
+    if _BROWSER is None:
+        try:
+            _BROWSER = webbrowser.get()
+        except webbrowser.Error as e:
+            print("No web browser available:", e)
+            return False
+    return _BROWSER.open(uri)
 
 def open_url(url):
     if HAS_TERMUX_OPEN:
-        subprocess.Popen(["termux-open-url", url])
+        _termux_exec(["termux-open-url", url])
     else:
-        webbrowser.open(url)
+        _browser_open(url)
 
 def open_file_or_uri(uri):
     if HAS_TERMUX_OPEN:
-        subprocess.Popen(["termux-open", uri])
+        _termux_exec(["termux-open", uri])
     else:
-        webbrowser.open(uri)
+        _browser_open(uri)
 
 def send_sms(number, message):
     if HAS_TERMUX_SMS:
-        subprocess.run(["termux-sms-send", "-n", number, message])
+        _termux_exec(["termux-sms-send", "-n", number, message], background=False)
         return True
     else:
         return False
 
 def make_call(number):
     if HAS_TERMUX_CALL:
-        subprocess.run(["termux-telephony-call", number])
+        _termux_exec(["termux-telephony-call", number], background=False)
         return True
     else:
         return False
 
-def schedule_reminder(rem_time: datetime, message: str):
-    def worker(rem_time, message):
-        now = datetime.now()
-        wait = (rem_time - now).total_seconds()
+# Reminders: one scheduler task over a min-heap of (due_ts, message), keyed on
+# wall-clock time. The loop's own timers run on CLOCK_MONOTONIC, which stops
+# while the phone is suspended, so the worker never sleeps longer than
+# _REM_MAX_SLEEP before re-checking time.time().
+_REM_HEAP = []
+_REM_WAKE = None  # asyncio.Event, set when a new reminder is pushed
+_REM_TASK = None
+_REM_MAX_SLEEP = 30.0
+
+async def _reminder_worker():
+    while True:
+        if not _REM_HEAP:
+            await _REM_WAKE.wait()
+            _REM_WAKE.clear()
+            continue
+        due, message = _REM_HEAP[0]
+        wait = due - time.time()
         if wait > 0:
-            time.sleep(wait)
+            try:
+                await asyncio.wait_for(_REM_WAKE.wait(), timeout=min(wait, _REM_MAX_SLEEP))
+            except asyncio.TimeoutError:
+                pass
+            _REM_WAKE.clear()
+            continue
+        heapq.heappop(_REM_HEAP)
         say_and_print("Reminder: " + message)
-    t = threading.Thread(target=worker, args=(rem_time, message), daemon=True)
-    t.start()
+
+def schedule_reminder(rem_time: datetime, message: str):
+    global _REM_WAKE, _REM_TASK
+    if _REM_TASK is None or _REM_TASK.done():
+        _REM_WAKE = asyncio.Event()
+        _REM_TASK = asyncio.get_running_loop().create_task(_reminder_worker())
+    heapq.heappush(_REM_HEAP, (rem_time.timestamp(), message))
+    _REM_WAKE.set()
     REMINDERS.append((rem_time, message))
 
 # Command parsing & handling
-def handle_command(text):
-    if not text:
-        return
+# Commands are dispatched in two steps:
+# 1) the first word is looked up in _PREFIX_INTENTS, and the rest of the
+#    utterance is matched against that intent's argument pattern;
+# 2) otherwise one alternation over the keyword intents, tried in priority
+#    order; the named group that matched (m.lastgroup) selects the handler
+#    in _INTENT_HANDLERS.
+_INTENT_RE = re.compile(
+    r"^(?:"
+    r"(?P<exit>.*\b(?:exit|quit|stop|bye)\b.*)"
+    r"|(?P<time>.*\btime\b.*)"
+    r"|(?P<date>.*\bdate\b.*)"
+    r"|(?P<note>.*take note.*)"
+    r"|(?P<remind>.*remind me.*)"
+    r"|(?P<wiki>.*wikipedia.*|who is .+|what is .+)"
+    r")$"
+)
 
-    txt = text.lower().strip()
-    print("Heard:", txt)
-
-    # Basic intents
-    if any(ww in txt for ww in ("exit", "quit", "stop", "bye")):
-        say_and_print("Goodbye! Stopping assistant.")
-        sys.exit(0)
+async def _do_exit(m):
+    say_and_print("Goodbye! Stopping assistant.")
+    sys.exit(0)
 
-    if "time" in txt:
-        now = datetime.now()
-        say_and_print(now.strftime("The time is %I:%M %p."))
-        return
+async def _do_time(m):
+    now = datetime.now()
+    say_and_print(now.strftime(TIME_FORMAT))
 
-    if "date" in txt:
-        today = datetime.now().date().isoformat()
-        say_and_print("Today's date is " + today)
-        return
+async def _do_date(m):
+    today = datetime.now().date().isoformat()
+    say_and_print("Today's date is " + today)
 
-    if txt.startswith("search ") or txt.startswith("google "):
-        q = txt.split(" ", 1)[1]
-        say_and_print(f"Searching the web for {q}")
-        open_url(f"https://www.google.com/search?q={q.replace(' ', '+')}")
-        return
+async def _do_search(m):
+    q = m.group("q")
+    say_and_print(f"Searching the web for {q}")
+    open_url("https://www.google.com/search?q=" + quote_plus(q))
 
-    if txt.startswith("open ") or txt.startswith("launch "):
-        target = txt.split(" ", 1)[1]
-        say_and_print(f"Opening {target}")
-        # If it looks like a URL, open it; else try to open via termux-open
-        if target.startswith("http"):
-            open_url(target)
+async def _do_open(m):
+    target = m.group("tgt")
+    say_and_print(f"Opening {target}")
+    # If it looks like a URL, open it; else try to open via termux-open
+    if target.startswith("http"):
+        open_url(target)
+    else:
+        # try as URL
+        if "." in target and " " not in target:
+            open_url("http://" + target)
         else:
-            # try as URL
-            if "." in target and " " not in target:
-                open_url("http://" + target)
-            else:
-                # attempt to open package or file via termux-open (best-effort)
-                open_file_or_uri(target)
-        return
+            # attempt to open package or file via termux-open (best-effort)
+            open_file_or_uri(target)
 
-    if txt.startswith("note ") or "take note" in txt:
-        # capture full note content
-        if txt.startswith("note "):
-            note_text = text.split(" ", 1)[1]
-        else:
-            say_and_print("What would you like me to note?")
-            note_text = listen_once() or ""
-        if note_text:
-            fname = add_note(note_text)
-            say_and_print(f"Saved note to {fname}")
-        else:
-            say_and_print("No note recorded.")
-        return
+async def _do_note(m):
+    # capture full note content
+    note_text = m.groupdict().get("nt")
+    if not note_text:
+        await ask("What would you like me to note?")
+        note_text = await listen_once() or ""
+    if note_text:
+        fname = add_note(note_text)
+        say_and_print(f"Note queued; it will be written to {fname} in a moment.")
+    else:
+        say_and_print("No note recorded.")
+
+# "in 10 minutes" / "in 1 hour 30 minutes" / "at 18:30" / "at 6:30 pm" / "at 7 a.m."
+_WHEN_UNIT = r"\d+\s*(?:second|minute|hour)s?\b"
+_WHEN_RE = re.compile(
+    r"\bin\s+(?P<rel>" + _WHEN_UNIT + r"(?:(?:\s*,\s*|\s+and\s+|\s+)" + _WHEN_UNIT + r")*)"
+    r"|\bat\s+(?P<hh>\d{1,2})(?::(?P<mm>\d+))?\s*(?:(?P<ampm>[ap])\.?m\b\.?)?",
+    re.I,
+)
+_WHEN_PART_RE = re.compile(r"(?P<n>\d+)\s*(?P<unit>second|minute|hour)s?\b", re.I)
+_WHEN_UNITS = {"second": "seconds", "minute": "minutes", "hour": "hours"}
 
-    if "remind me" in txt:
-        # naive parse: "remind me in 10 minutes to check oven" or "remind me at 18:30 to call mom"
-        say_and_print("Okay, when should I remind you? (say in 10 minutes / at 18:30 / in 1 hour)")
-        when = listen_once() or ""
-        say_and_print("What is the reminder message?")
-        message = listen_once() or "Reminder"
+def parse_reminder_time(when, now):
+    """Turn a spoken "when" into a datetime after now, or None if it can't be parsed."""
+    _td = timedelta  # local alias: LOAD_FAST instead of a global lookup per use
+    m = _WHEN_RE.search(when)
+    if not m:
+        return None
+    if m.group("rel"):
+        # sum every component: "in 1 hour 30 minutes" is 90 minutes
+        delta = _td()
+        for part in _WHEN_PART_RE.finditer(m.group("rel")):
+            delta += _td(**{_WHEN_UNITS[part.group("unit").lower()]: int(part.group("n"))})
+        return now + delta
+    hh = int(m.group("hh"))
+    mm = m.group("mm")
+    if mm is not None and len(mm) != 2:
+        # "7:5" could be 7:05 or 7:50; don't guess
+        return None
+    mm = int(mm or 0)
+    ampm = m.group("ampm")
+    if ampm:
+        hh = hh % 12 + (12 if ampm.lower() == "p" else 0)
+    rem_time = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    if rem_time < now:
+        rem_time = rem_time + _td(days=1)
+    return rem_time
+
+async def _do_remind(m):
+    await ask("Okay, when should I remind you? (say in 10 minutes / at 18:30 / in 1 hour)")
+    when = await listen_once() or ""
+    await ask("What is the reminder message?")
+    message = await listen_once() or "Reminder"
+    try:
+        rem_time = parse_reminder_time(when, datetime.now())
+    except Exception as e:
+        print("Reminder parse error:", e)
         rem_time = None
-        now = datetime.now()
+
+    if rem_time:
+        schedule_reminder(rem_time, message)
+        say_and_print(f"Reminder set for {rem_time.isoformat()}")
+    else:
+        say_and_print("Couldn't parse time. Reminder not set.")
+
+async def _do_call(m):
+    number = m.group("num").strip()
+    if make_call(number):
+        say_and_print(f"Calling {number}")
+    else:
+        say_and_print("Call feature unavailable on this device.")
+
+async def _do_sms(m):
+    # e.g. "send sms to +911234567890"
+    number = m.group("smsnum")
+    if number:
+        await ask("What is the message?")
+        message = await listen_once() or ""
+        if message and send_sms(number, message):
+            say_and_print("Message sent.")
+        else:
+            say_and_print("Unable to send message.")
+    else:
+        say_and_print("Please say the command like: send sms to +91xxxxxxxxxx")
+
+async def _do_wiki(m):
+    query = m.string.replace("wikipedia", "").strip()
+    if query.startswith("who is ") or query.startswith("what is "):
+        query = ' '.join(query.split(" ")[2:])
+    if wikipedia:
         try:
-            if when.startswith("in "):
-                # parse minutes/hours
-                when = when[3:].strip()
-                if "minute" in when:
-                    n = int(''.join(ch for ch in when if ch.isdigit()) or 0)
-                    rem_time = now + timedelta(minutes=n)
-                elif "hour" in when:
-                    n = int(''.join(ch for ch in when if ch.isdigit()) or 0)
-                    rem_time = now + timedelta(hours=n)
-            elif when.startswith("at "):
-                tstr = when.split(" ", 1)[1]
-                # naive HH:MM
-                hh, mm = map(int, tstr.split(":"))
-                rem_time = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
-                if rem_time < now:
-                    rem_time = rem_time + timedelta(days=1)
+            summary = await asyncio.to_thread(wikipedia.summary, query, sentences=2)
+            say_and_print(summary)
         except Exception as e:
-            print("Reminder parse error:", e)
-            rem_time = None
+            say_and_print("Couldn't fetch Wikipedia summary: " + str(e))
+    else:
+        say_and_print("Wikipedia library not installed. Opening web search.")
+        # article titles use "_" for spaces; "+" would be taken literally
+        open_url("https://en.wikipedia.org/wiki/" + quote(query.replace(" ", "_")))
 
-        if rem_time:
-            schedule_reminder(rem_time, message)
-            say_and_print(f"Reminder set for {rem_time.isoformat()}")
-        else:
-            say_and_print("Couldn't parse time. Reminder not set.")
-        return
+_SEARCH_ARGS = re.compile(r"(?P<q>.+)")
+_OPEN_ARGS = re.compile(r"(?P<tgt>.+)")
+_PREFIX_INTENTS = {
+    # first word: (pattern for the rest of the utterance, handler)
+    "search": (_SEARCH_ARGS, _do_search),
+    "google": (_SEARCH_ARGS, _do_search),
+    "open": (_OPEN_ARGS, _do_open),
+    "launch": (_OPEN_ARGS, _do_open),
+    "note": (re.compile(r"(?P<nt>.+)"), _do_note),
+    "call": (re.compile(r"(?P<num>.+)"), _do_call),
+    "send": (re.compile(r"(?:sms|message) to(?: (?P<smsnum>.+))?"), _do_sms),
+}
 
-    if txt.startswith("call "):
-        number = txt.split(" ", 1)[1].strip()
-        if make_call(number):
-            say_and_print(f"Calling {number}")
-        else:
-            say_and_print("Call feature unavailable on this device.")
-        return
+_INTENT_HANDLERS = {
+    "exit": _do_exit,
+    "time": _do_time,
+    "date": _do_date,
+    "note": _do_note,
+    "remind": _do_remind,
+    "wiki": _do_wiki,
+}
 
-    if txt.startswith("send sms to ") or txt.startswith("send message to "):
-        # e.g. "send sms to +911234567890"
-        parts = txt.split(" ", 3)
-        if len(parts) >= 4:
-            number = parts[3]
-            say_and_print("What is the message?")
-            message = listen_once() or ""
-            if message and send_sms(number, message):
-                say_and_print("Message sent.")
-            else:
-                say_and_print("Unable to send message.")
-        else:
-            say_and_print("Please say the command like: send sms to +91xxxxxxxxxx")
+async def handle_command(text):
+    """Dispatch one utterance. text must already be lowercase, as listen_once returns it."""
+    if not text:
         return
 
-    if "wikipedia" in txt or txt.startswith("who is ") or txt.startswith("what is "):
-        query = txt.replace("wikipedia", "").strip()
-        if query.startswith("who is ") or query.startswith("what is "):
-            query = ' '.join(query.split(" ")[2:])
-        if wikipedia:
-            try:
-                summary = wikipedia.summary(query, sentences=2)
-                say_and_print(summary)
-            except Exception as e:
-                say_and_print("Couldn't fetch Wikipedia summary: " + str(e))
-        else:
-            say_and_print("Wikipedia library not installed. Opening web search.")
-            open_url(f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}")
+    assert text == text.lower(), "handle_command expects listen_once's lowercased text"
+    txt = text.strip()
+    print("Heard:", txt)
+
+    first, _, rest = txt.partition(" ")
+    prefix = _PREFIX_INTENTS.get(first)
+    if prefix:
+        args_re, handler = prefix
+        m = args_re.fullmatch(rest)
+        if m:
+            await handler(m)
+            return
+
+    m = _INTENT_RE.match(txt)
+    if m:
+        await _INTENT_HANDLERS[m.lastgroup](m)
         return
 
     # Default fallback: open web search
     say_and_print("I didn't catch a specific command — searching the web for: " + txt)
-    open_url("https://www.google.com/search?q=" + txt.replace(" ", "+"))
+    open_url("https://www.google.com/search?q=" + quote_plus(txt))
 
 # Wake-word loop
-def main_loop():
+async def main_loop(push_to_talk=False):
+    if push_to_talk:
+        say_and_print("Mobile assistant started in push-to-talk mode.")
+        while True:
+            await wait_for_push_to_talk()
+            await ask("Yes? How can I help?")
+            cmd = await listen_once(timeout=10, phrase_time_limit=12)
+            await handle_command(cmd)
+
     say_and_print("Mobile assistant started. Say the wake word: " + WAKE_WORDS[0])
     while True:
+        # Prefer the on-device spotter: nothing leaves the phone until the wake word fires
+        if await wait_for_wake_word():
+            await ask("Yes? How can I help?")
+            cmd = await listen_once(timeout=10, phrase_time_limit=12)
+            await handle_command(cmd)
+            continue
         # Listen passively for short phrase
-        spoken = listen_once(timeout=6, phrase_time_limit=6)
+        spoken = await listen_once(timeout=6, phrase_time_limit=6)
         if not spoken:
             continue
-        spoken = spoken.lower()
         # If wake word present in phrase (or direct command), handle
-        if any(ww in spoken for ww in WAKE_WORDS):
-            say_and_print("Yes? How can I help?")
-            cmd = listen_once(timeout=10, phrase_time_limit=12)
-            handle_command(cmd)
+        wake = _WAKE_RE.search(spoken)
+        if wake:
+            # "jarvis, what time is it": the command is already here, don't prompt and listen again
+            tail = spoken[wake.end():].strip(" ,.!?")
+            if tail:
+                await handle_command(tail)
+                continue
+            await ask("Yes? How can I help?")
+            cmd = await listen_once(timeout=10, phrase_time_limit=12)
+            await handle_command(cmd)
         else:
             # If user speaks a direct command without wake word, optionally handle
             # To avoid accidental triggers, require wake word OR direct "assistant" command
-            if spoken.startswith("assistant") or spoken.startswith("jarvis"):
+            # (real wake words were already caught by _WAKE_RE above)
+            if spoken == "assistant" or spoken.startswith("assistant "):
                 cmd = spoken.split(" ", 1)[1] if " " in spoken else None
-                handle_command(cmd)
+                await handle_command(cmd)
             else:
                 # ignore or beep (not implemented)
                 pass
 
 if __name__ == "__main__":
+    install_exit_handlers()
     try:
-        main_loop()
+        asyncio.run(main_loop(push_to_talk="--ptt" in sys.argv[1:]))
     except KeyboardInterrupt:
         say_and_print("Assistant stopped by user.")
         sys.exit(0)